@@ -3,16 +3,18 @@ from PIL import Image
 from pdf2image import convert_from_bytes
 import io
 import sys
+import time
+import asyncio
 import logging
 import os
 import base64
 from datetime import datetime
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 from dotenv import load_dotenv
 from db import LecturasDB
-import subprocess
 from pdfminer.high_level import extract_text
 import requests
+import httpx
 
 # Cargar variables de entorno
 load_dotenv()
@@ -23,6 +25,44 @@ logger = logging.getLogger(__name__)
 
 # Configuración de OpenAI
 client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+MODELO_OPENAI_VISION = "gpt-4.1-2025-04-14"
+MODELO_OPENAI_ANALISIS = "gpt-4o"
+
+# Configuración de Ollama
+MODELO_OLLAMA = "gemma3:12b"
+OLLAMA_API_URL = "http://localhost:11434/api/generate"
+# Con "stream": False Ollama no envía nada hasta terminar, y las solicitudes pueden quedar
+# en cola en el servidor; por eso solo se limita el tiempo de conexión, no el de lectura
+OLLAMA_TIMEOUT_CONEXION = 10
+
+# Máximo de archivos y solicitudes a OpenAI procesados en paralelo en el modo por lote
+MAX_CONCURRENCIA_DEFECTO = 5
+# Máximo de solicitudes simultáneas a Ollama; un servidor local atiende pocas a la vez
+MAX_CONCURRENCIA_OLLAMA_DEFECTO = 2
+
+# Segundos entre actualizaciones de la tabla de progreso del lote
+INTERVALO_REFRESCO = 1
+
+def leer_max_concurrencia(variable, defecto):
+    """Lee un límite de concurrencia del entorno; usa el valor por defecto si no es un entero válido."""
+    try:
+        return max(1, int(os.getenv(variable, defecto)))
+    except ValueError:
+        logger.warning(f"{variable} inválido, se usa {defecto}")
+        return defecto
+
+MAX_CONCURRENCIA = leer_max_concurrencia('MAX_CONCURRENCIA', MAX_CONCURRENCIA_DEFECTO)
+MAX_CONCURRENCIA_OLLAMA = leer_max_concurrencia('MAX_CONCURRENCIA_OLLAMA', MAX_CONCURRENCIA_OLLAMA_DEFECTO)
+
+# Precios de OpenAI en USD por millón de tokens (entrada, salida)
+PRECIOS_OPENAI = {
+    MODELO_OPENAI_VISION: (2.00, 8.00),
+    MODELO_OPENAI_ANALISIS: (2.50, 10.00),
+}
+
+INSTRUCCION_VINETAS = "Responde únicamente con análisis estructurado en viñetas, sin saludos ni mensajes de cortesía."
+PROMPT_IMAGEN_OPENAI = "Analiza esta factura o boleta y extrae toda la información de la factura de manera estructurada y clara, usando viñetas para cada dato."
+PROMPT_IMAGEN_OLLAMA = "Analiza esta factura o boleta y extrae toda la información de la factura de manera estructurada y clara, usando bullets para cada dato, indicando toda la información del documento, cantidades, codigos, etc, sin saludos ni mensajes de cortesía.\nAnaliza esta factura o boleta y extrae toda la información de manera estructurada usando viñetas."
 
 def verificar_api():
     """Verifica si la API de OpenAI está configurada correctamente."""
@@ -41,31 +81,121 @@ def verificar_api():
     except Exception as e:
         return False, f"Error al conectar con OpenAI: {str(e)}"
 
+def mensajes_imagen_openai(imagen_bytes):
+    """Construye los mensajes para analizar una imagen con GPT-4 Vision."""
+    imagen_base64 = base64.b64encode(imagen_bytes).decode('utf-8')
+    return [
+        {"role": "system", "content": INSTRUCCION_VINETAS},
+        {
+            "role": "user",
+            "content": [
+                {"type": "text", "text": PROMPT_IMAGEN_OPENAI},
+                {
+                    "type": "image_url",
+                    "image_url": {"url": f"data:image/jpeg;base64,{imagen_base64}"}
+                }
+            ]
+        }
+    ]
+
+def mensajes_analisis_openai(texto, historial_mensajes=None, es_correccion=False):
+    """Construye los mensajes para analizar texto (o una pregunta/corrección) con OpenAI."""
+    system_msg = {"role": "system", "content": INSTRUCCION_VINETAS}
+    if historial_mensajes is None:
+        return [system_msg, {"role": "user", "content": texto}]
+    if es_correccion:
+        prompt = f"Basándote en el análisis anterior y la corrección proporcionada: '{texto}', genera un nuevo análisis completo y actualizado de la factura. Mantén el formato de viñetas, sin mensajes de cortesía."  # correcciones
+    else:
+        prompt = texto
+    return [system_msg] + historial_mensajes + [{"role": "user", "content": prompt}]
+
+def prompt_analisis_local(texto, historial_mensajes=None, es_correccion=False):
+    """Construye el prompt para analizar texto (o una pregunta/corrección) con el modelo local."""
+    instruction = INSTRUCCION_VINETAS + "\n\n"
+    if historial_mensajes is None:
+        return instruction + texto
+    if es_correccion:
+        return instruction + f"Basándote en el análisis anterior y la corrección proporcionada: '{texto}', genera un nuevo análisis completo y actualizado de la factura, en viñetas."
+    historial_texto = "\n".join([f"{m['role']}: {m['content']}" for m in historial_mensajes])
+    return instruction + historial_texto + "\nuser: " + texto
+
+def payload_ollama(prompt, imagenes=None):
+    """Construye el payload para la API REST de Ollama."""
+    payload = {
+        "model": MODELO_OLLAMA, # Asegúrate que este modelo esté disponible en tu Ollama
+        "prompt": prompt,
+        "stream": False # Para obtener respuesta completa, no streaming
+    }
+    if imagenes:
+        payload["images"] = imagenes # Imágenes como lista de strings base64
+    return payload
+
+def leer_respuesta_ollama(response_data):
+    """Extrae el texto generado de la respuesta JSON de Ollama, o un mensaje de error."""
+    if 'response' in response_data:
+        return response_data['response']
+    # Podría haber un error específico en la respuesta JSON de Ollama
+    error_msg = response_data.get('error', 'Respuesta inesperada de la API de Ollama')
+    logger.error(f"Error en respuesta de API Ollama: {error_msg}")
+    return f"Error en API Ollama: {error_msg}"
+
+def error_ollama(e):
+    """Registra y traduce una excepción de la API de Ollama a un mensaje de error."""
+    if isinstance(e, (requests.exceptions.ConnectionError, httpx.ConnectError)):
+        logger.error("Error: No se pudo conectar a la API de Ollama. ¿Está Ollama corriendo?")
+        return "Error: No se pudo conectar a Ollama. Verifica que esté en ejecución."
+    if isinstance(e, (requests.exceptions.RequestException, httpx.HTTPError)):
+        logger.error(f"Error en la solicitud a la API de Ollama: {str(e)}")
+        return f"Error en API Ollama: {str(e)}"
+    logger.error(f"Error procesando con modelo local (API): {str(e)}")
+    return f"Error procesando con modelo local (API): {str(e)}"
+
+def es_error(texto):
+    """Indica si el resultado de una etapa corresponde a un mensaje de error."""
+    if not isinstance(texto, str) or not texto:
+        return True
+    return texto.startswith("Error") or "Error al procesar" in texto
+
+def calcular_costo(modelo_api, usage):
+    """Calcula el costo en USD de una llamada a OpenAI según los tokens usados."""
+    if usage is None or modelo_api not in PRECIOS_OPENAI:
+        return 0.0
+    precio_entrada, precio_salida = PRECIOS_OPENAI[modelo_api]
+    return (usage.prompt_tokens * precio_entrada + usage.completion_tokens * precio_salida) / 1_000_000
+
+def pdf_a_imagenes_jpeg(pdf_bytes):
+    """Convierte un PDF en una lista de páginas codificadas como JPEG."""
+    paginas = []
+    for imagen in convert_from_bytes(pdf_bytes):
+        img_byte_arr = io.BytesIO()
+        imagen.save(img_byte_arr, format='JPEG')
+        paginas.append(img_byte_arr.getvalue())
+    return paginas
+
+def error_pdf_a_imagenes(e):
+    """Traduce un error al convertir el PDF; retorna None si no es un error conocido."""
+    if "poppler" in str(e).lower():
+        error_msg = "Error: Poppler no está instalado. Por favor, ejecuta 'brew install poppler' en la terminal."
+        logger.error(error_msg)
+        return error_msg
+    return None
+
+def extraer_texto_pdf(pdf_bytes):
+    """Extrae el texto de un PDF; retorna (texto, None) o (None, mensaje de error)."""
+    try:
+        return extract_text(io.BytesIO(pdf_bytes)), None
+    except Exception as e:
+        logger.error(f"Error al extraer texto del PDF: {str(e)}")
+        return None, f"Error al extraer texto del PDF: {str(e)}"
+
 def procesar_imagen(imagen_bytes):
     """Procesa una imagen usando GPT-4 Vision."""
     try:
-        # Convertir la imagen a base64
-        imagen_base64 = base64.b64encode(imagen_bytes).decode('utf-8')
-        
-        # Crear el mensaje para GPT-4 Vision
         response = client.chat.completions.create(
-            model="gpt-4.1-2025-04-14",
-            messages=[
-                {"role": "system", "content": "Responde únicamente con análisis estructurado en viñetas, sin saludos niS mensajes de cortesía."},
-                {
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": "Analiza esta factura o boleta y extrae toda la información de la factura de manera estructurada y clara, usando viñetas para cada dato."},
-                        {
-                            "type": "image_url",
-                            "image_url": {"url": f"data:image/jpeg;base64,{imagen_base64}"}
-                        }
-                    ]
-                }
-            ],
+            model=MODELO_OPENAI_VISION,
+            messages=mensajes_imagen_openai(imagen_bytes),
             max_tokens=1000
         )
-        
         return response.choices[0].message.content
     except Exception as e:
         logger.error(f"Error al procesar la imagen: {str(e)}")
@@ -75,111 +205,53 @@ def procesar_pdf(pdf_bytes):
     """Convierte PDF a imágenes y procesa con GPT-4 Vision."""
     try:
         try:
-            imagenes = convert_from_bytes(pdf_bytes)
+            paginas = pdf_a_imagenes_jpeg(pdf_bytes)
         except Exception as e:
-            if "poppler" in str(e).lower():
-                error_msg = "Error: Poppler no está instalado. Por favor, ejecuta 'brew install poppler' en la terminal."
-                logger.error(error_msg)
+            error_msg = error_pdf_a_imagenes(e)
+            if error_msg:
                 return error_msg
             raise e
-            
-        resultados = []
-        for imagen in imagenes:
-            # Convertir imagen PIL a bytes
-            img_byte_arr = io.BytesIO()
-            imagen.save(img_byte_arr, format='JPEG')
-            img_byte_arr = img_byte_arr.getvalue()
-            
-            # Procesar cada imagen con GPT-4 Vision
-            resultado = procesar_imagen(img_byte_arr)
-            resultados.append(resultado)
-            
+
+        # Procesar cada página con GPT-4 Vision
+        resultados = [procesar_imagen(pagina) for pagina in paginas]
         return '\n\n---\n\n'.join(resultados)
     except Exception as e:
         logger.error(f"Error al procesar el PDF: {str(e)}")
         return f"Error al procesar el PDF: {str(e)}"
 
-def procesar_imagen_local_modelo(imagen_bytes):
-    """Envía imagen (base64) al modelo local via API REST de Ollama."""
+def generar_ollama(prompt, imagenes=None):
+    """Envía un prompt (y opcionalmente imágenes en base64) a la API REST de Ollama."""
     try:
-        imagen_base64 = base64.b64encode(imagen_bytes).decode('utf-8')
-        ollama_api_url = "http://localhost:11434/api/generate" 
-        
-        # Prompt textual (sin la imagen)
-        prompt_text = "Analiza esta factura o boleta y extrae toda la información de la factura de manera estructurada y clara, usando bullets para cada dato, indicando toda la información del documento, cantidades, codigos, etc, sin saludos ni mensajes de cortesía.\nAnaliza esta factura o boleta y extrae toda la información de manera estructurada usando viñetas."
-
-        payload = {
-            "model": "gemma3:12b", # Asegúrate que este modelo esté disponible en tu Ollama
-            "prompt": prompt_text,
-            "images": [imagen_base64], # La imagen como lista de strings base64
-            "stream": False # Para obtener respuesta completa, no streaming
-        }
-
-        response = requests.post(ollama_api_url, json=payload)
+        response = requests.post(OLLAMA_API_URL, json=payload_ollama(prompt, imagenes), timeout=(OLLAMA_TIMEOUT_CONEXION, None))
         response.raise_for_status() # Lanza excepción para errores HTTP (4xx o 5xx)
-
-        response_data = response.json()
-        
-        # Verificar si la respuesta contiene el campo 'response' esperado
-        if 'response' in response_data:
-             return response_data['response']
-        else:
-             # Podría haber un error específico en la respuesta JSON de Ollama
-             error_msg = response_data.get('error', 'Respuesta inesperada de la API de Ollama')
-             logger.error(f"Error en respuesta de API Ollama: {error_msg}")
-             return f"Error en API Ollama: {error_msg}"
-
-    except requests.exceptions.ConnectionError:
-        logger.error("Error: No se pudo conectar a la API de Ollama. ¿Está Ollama corriendo?")
-        return "Error: No se pudo conectar a Ollama. Verifica que esté en ejecución."
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Error en la solicitud a la API de Ollama: {str(e)}")
-        return f"Error en API Ollama: {str(e)}"
+        return leer_respuesta_ollama(response.json())
     except Exception as e:
-        logger.error(f"Error procesando imagen con modelo local (API): {str(e)}")
-        return f"Error procesando imagen local (API): {str(e)}"
+        return error_ollama(e)
+
+def procesar_imagen_local_modelo(imagen_bytes):
+    """Envía imagen (base64) al modelo local via API REST de Ollama."""
+    imagen_base64 = base64.b64encode(imagen_bytes).decode('utf-8')
+    return generar_ollama(PROMPT_IMAGEN_OLLAMA, [imagen_base64])
 
 def procesar_pdf_local_modelo(pdf_bytes):
     """Extrae texto del PDF y envía al modelo local Gemma3:12B."""
-    try:
-        texto = extract_text(io.BytesIO(pdf_bytes))
-    except Exception as e:
-        logger.error(f"Error al extraer texto del PDF: {str(e)}")
-        return f"Error al extraer texto del PDF: {str(e)}"
-    instruction = "Responde únicamente con análisis estructurado en viñetas, sin saludos ni mensajes de cortesía."
-    prompt = f"{instruction}\n{texto}"
-    completed = subprocess.run(
-        ["ollama", "run", "gemma3:12b"],
-        input=prompt,
-        capture_output=True,
-        text=True
-    )
-    if completed.returncode != 0:
-        logger.error(f"Error al ejecutar modelo local: {completed.stderr}")
-        return f"Error al ejecutar modelo local: {completed.stderr}"
-    return completed.stdout
+    texto, error_msg = extraer_texto_pdf(pdf_bytes)
+    if error_msg:
+        return error_msg
+    return generar_ollama(f"{INSTRUCCION_VINETAS}\n{texto}")
 
 def analizar_texto_con_openai(texto, historial_mensajes=None, es_correccion=False):
     """Analiza el texto usando OpenAI."""
     try:
         if "Error al procesar" in texto:
             return "No se puede analizar debido a un error en el procesamiento del documento"
-        
-        # Sistema: respuestas solo con análisis estructurado en viñetas
-        system_msg = {"role": "system", "content": "Responde únicamente con análisis estructurado en viñetas, sin saludos ni mensajes de cortesía."}
-        if historial_mensajes is None:
-            mensajes = [system_msg, {"role": "user", "content": texto}]
-        else:
-            if es_correccion:
-                prompt = f"Basándote en el análisis anterior y la corrección proporcionada: '{texto}', genera un nuevo análisis completo y actualizado de la factura. Mantén el formato de viñetas, sin mensajes de cortesía."  # correcciones
-            else:
-                prompt = texto
-            mensajes = [system_msg] + historial_mensajes + [{"role": "user", "content": prompt}]
-        
+
+        mensajes = mensajes_analisis_openai(texto, historial_mensajes, es_correccion)
+
         logger.info("Enviando consulta a OpenAI")
         try:
             respuesta = client.chat.completions.create(
-                model="gpt-4o",
+                model=MODELO_OPENAI_ANALISIS,
                 messages=mensajes,
                 temperature=0.7,
                 max_tokens=1000
@@ -193,28 +265,196 @@ def analizar_texto_con_openai(texto, historial_mensajes=None, es_correccion=Fals
         return f"Error en el análisis: {str(e)}"
 
 def analizar_texto_local(texto, historial_mensajes=None, es_correccion=False):
-    """Analiza el texto usando modelo local Gemma3:12B con Ollama."""
+    """Analiza el texto usando modelo local Gemma3:12B vía la API REST de Ollama."""
+    if "Error al procesar" in texto:
+        return "No se puede analizar debido a un error en el procesamiento del documento"
+    return generar_ollama(prompt_analisis_local(texto, historial_mensajes, es_correccion))
+
+async def procesar_imagen_async(client_async, semaforo_solicitudes, imagen_bytes):
+    """Versión asíncrona de procesar_imagen. Retorna (texto, costo)."""
     try:
-        if "Error al procesar" in texto:
-            return "No se puede analizar debido a un error en el procesamiento del documento"
-        instruction = "Responde únicamente con análisis estructurado en viñetas, sin saludos ni mensajes de cortesía.\n\n"
-        if historial_mensajes is None:
-            prompt = instruction + texto
-        else:
-            if es_correccion:
-                prompt = instruction + f"Basándote en el análisis anterior y la corrección proporcionada: '{texto}', genera un nuevo análisis completo y actualizado de la factura, en viñetas."
-            else:
-                historial_texto = "\n".join([f"{m['role']}: {m['content']}" for m in historial_mensajes])
-                prompt = instruction + historial_texto + "\nuser: " + texto
-        cmd = ["ollama", "run", "gemma3:12b", prompt]
-        completed = subprocess.run(cmd, capture_output=True, text=True)
-        if completed.returncode != 0:
-            logger.error(f"Error al correr modelo local: {completed.stderr}")
-            return f"Error al ejecutar el modelo local: {completed.stderr}"
-        return completed.stdout
+        async with semaforo_solicitudes:
+            response = await client_async.chat.completions.create(
+                model=MODELO_OPENAI_VISION,
+                messages=mensajes_imagen_openai(imagen_bytes),
+                max_tokens=1000
+            )
+        return response.choices[0].message.content, calcular_costo(MODELO_OPENAI_VISION, response.usage)
     except Exception as e:
-        logger.error(f"Error en el modelo local: {str(e)}")
-        return f"Error en modelo local: {str(e)}"
+        logger.error(f"Error al procesar la imagen: {str(e)}")
+        return f"Error al procesar la imagen: {str(e)}", 0.0
+
+async def procesar_pdf_async(client_async, semaforo_solicitudes, pdf_bytes):
+    """Versión asíncrona de procesar_pdf; las páginas se procesan en paralelo. Retorna (texto, costo).
+
+    Las páginas comparten semaforo_solicitudes con el resto del lote, por lo que un PDF largo
+    no supera el límite de solicitudes simultáneas a OpenAI.
+    """
+    try:
+        try:
+            paginas = await asyncio.to_thread(pdf_a_imagenes_jpeg, pdf_bytes)
+        except Exception as e:
+            error_msg = error_pdf_a_imagenes(e)
+            if error_msg:
+                return error_msg, 0.0
+            raise e
+
+        resultados = await asyncio.gather(*(procesar_imagen_async(client_async, semaforo_solicitudes, pagina) for pagina in paginas))
+        texto = '\n\n---\n\n'.join(resultado for resultado, _ in resultados)
+        costo = sum(costo for _, costo in resultados)
+        return texto, costo
+    except Exception as e:
+        logger.error(f"Error al procesar el PDF: {str(e)}")
+        return f"Error al procesar el PDF: {str(e)}", 0.0
+
+async def generar_ollama_async(http_client, semaforo_solicitudes, prompt, imagenes=None):
+    """Versión asíncrona de generar_ollama."""
+    try:
+        async with semaforo_solicitudes:
+            response = await http_client.post(OLLAMA_API_URL, json=payload_ollama(prompt, imagenes))
+        response.raise_for_status()
+        return leer_respuesta_ollama(response.json())
+    except Exception as e:
+        return error_ollama(e)
+
+async def procesar_imagen_local_async(http_client, semaforo_solicitudes, imagen_bytes):
+    """Versión asíncrona de procesar_imagen_local_modelo."""
+    imagen_base64 = base64.b64encode(imagen_bytes).decode('utf-8')
+    return await generar_ollama_async(http_client, semaforo_solicitudes, PROMPT_IMAGEN_OLLAMA, [imagen_base64])
+
+async def procesar_pdf_local_async(http_client, semaforo_solicitudes, pdf_bytes):
+    """Versión asíncrona de procesar_pdf_local_modelo."""
+    texto, error_msg = await asyncio.to_thread(extraer_texto_pdf, pdf_bytes)
+    if error_msg:
+        return error_msg
+    return await generar_ollama_async(http_client, semaforo_solicitudes, f"{INSTRUCCION_VINETAS}\n{texto}")
+
+async def analizar_texto_con_openai_async(client_async, semaforo_solicitudes, texto):
+    """Versión asíncrona de analizar_texto_con_openai (sin historial). Retorna (analisis, costo)."""
+    try:
+        async with semaforo_solicitudes:
+            respuesta = await client_async.chat.completions.create(
+                model=MODELO_OPENAI_ANALISIS,
+                messages=mensajes_analisis_openai(texto),
+                temperature=0.7,
+                max_tokens=1000
+            )
+        return respuesta.choices[0].message.content, calcular_costo(MODELO_OPENAI_ANALISIS, respuesta.usage)
+    except Exception as e:
+        logger.error(f"Error al comunicarse con OpenAI: {str(e)}")
+        return f"Error al analizar con OpenAI: {str(e)}", 0.0
+
+async def analizar_texto_local_async(http_client, semaforo_solicitudes, texto):
+    """Versión asíncrona de analizar_texto_local (sin historial)."""
+    return await generar_ollama_async(http_client, semaforo_solicitudes, prompt_analisis_local(texto))
+
+async def procesar_archivo_async(documento, fila, modelo, semaforo, semaforo_solicitudes, client_async, http_client, inicios, refrescar):
+    """Extrae y analiza un archivo del lote, actualizando su fila en la tabla de progreso.
+
+    Mientras el archivo está en proceso, su hora de inicio queda registrada en inicios para que
+    la tabla muestre el tiempo transcurrido aunque una llamada al modelo tarde en responder.
+
+    Retorna los datos de la lectura para guardar en la base de datos, o None si hubo un error.
+    """
+    nombre_archivo, tipo_documento, archivo_bytes = documento
+    usa_openai = modelo == 'GPT-4o (OpenAI)'
+    async with semaforo:
+        inicio = time.perf_counter()
+        inicios[id(fila)] = inicio
+        costo = 0.0
+
+        def actualizar(estado, detalle=""):
+            fila['Estado'] = estado
+            fila['Detalle'] = detalle
+            fila['Tiempo (s)'] = round(time.perf_counter() - inicio, 1)
+            fila['Costo (USD)'] = round(costo, 4)
+            refrescar()
+
+        try:
+            actualizar("Extrayendo")
+            if tipo_documento == 'application/pdf':
+                if usa_openai:
+                    texto_extraido, costo_etapa = await procesar_pdf_async(client_async, semaforo_solicitudes, archivo_bytes)
+                    costo += costo_etapa
+                else:
+                    texto_extraido = await procesar_pdf_local_async(http_client, semaforo_solicitudes, archivo_bytes)
+            else:
+                if usa_openai:
+                    texto_extraido, costo_etapa = await procesar_imagen_async(client_async, semaforo_solicitudes, archivo_bytes)
+                    costo += costo_etapa
+                else:
+                    texto_extraido = await procesar_imagen_local_async(http_client, semaforo_solicitudes, archivo_bytes)
+
+            if es_error(texto_extraido):
+                actualizar("❌ Error", texto_extraido or "El modelo no retornó contenido")
+                return None
+
+            actualizar("Analizando")
+            if usa_openai:
+                analisis, costo_etapa = await analizar_texto_con_openai_async(client_async, semaforo_solicitudes, texto_extraido)
+                costo += costo_etapa
+            else:
+                analisis = await analizar_texto_local_async(http_client, semaforo_solicitudes, texto_extraido)
+
+            if es_error(analisis):
+                actualizar("❌ Error", analisis or "El modelo no retornó contenido")
+                return None
+
+            actualizar("✅ Completado")
+            return {
+                'nombre_archivo': nombre_archivo,
+                'texto_extraido': texto_extraido,
+                'analisis': analisis,
+                'modelo': modelo,
+                'tipo_documento': tipo_documento,
+                'contenido_archivo': archivo_bytes
+            }
+        except Exception as e:
+            logger.error(f"Error inesperado al procesar {nombre_archivo}: {str(e)}")
+            actualizar("❌ Error", f"Error inesperado: {str(e)}")
+            return None
+        finally:
+            inicios.pop(id(fila), None)
+
+async def refrescar_periodicamente(filas, inicios, refrescar):
+    """Actualiza el tiempo de los archivos en proceso y redibuja la tabla cada INTERVALO_REFRESCO segundos."""
+    while True:
+        await asyncio.sleep(INTERVALO_REFRESCO)
+        ahora = time.perf_counter()
+        for fila in filas:
+            if id(fila) in inicios:
+                fila['Tiempo (s)'] = round(ahora - inicios[id(fila)], 1)
+        refrescar()
+
+async def procesar_lote_async(documentos, filas, modelo, refrescar):
+    """Procesa un lote de documentos en paralelo, con a lo más MAX_CONCURRENCIA archivos a la vez.
+
+    Las solicitudes al modelo (incluidas las páginas de los PDF) se limitan a MAX_CONCURRENCIA
+    para OpenAI y a MAX_CONCURRENCIA_OLLAMA para el modelo local.
+
+    Retorna la lista de lecturas procesadas correctamente.
+    """
+    semaforo = asyncio.Semaphore(MAX_CONCURRENCIA)
+    usa_openai = modelo == 'GPT-4o (OpenAI)'
+    semaforo_solicitudes = asyncio.Semaphore(MAX_CONCURRENCIA if usa_openai else MAX_CONCURRENCIA_OLLAMA)
+    client_async = AsyncOpenAI(api_key=os.getenv('OPENAI_API_KEY')) if usa_openai else None
+    inicios = {}
+    refresco = asyncio.create_task(refrescar_periodicamente(filas, inicios, refrescar))
+    try:
+        async with httpx.AsyncClient(timeout=httpx.Timeout(OLLAMA_TIMEOUT_CONEXION, read=None)) as http_client:
+            resultados = await asyncio.gather(*(
+                procesar_archivo_async(documento, fila, modelo, semaforo, semaforo_solicitudes, client_async, http_client, inicios, refrescar)
+                for documento, fila in zip(documentos, filas)
+            ))
+    finally:
+        refresco.cancel()
+        try:
+            await refresco
+        except asyncio.CancelledError:
+            pass
+        if client_async is not None:
+            await client_async.close()
+    return [lectura for lectura in resultados if lectura is not None]
 
 def mostrar_documento(contenido_archivo, tipo_documento):
     """Muestra un documento (imagen o PDF) en la interfaz."""
@@ -377,6 +617,79 @@ def mostrar_historial(db):
         else:
             st.warning(f"No se pudieron cargar los detalles para la lectura ID {lectura_id_seleccionada}.")
 
+def mostrar_procesamiento_lote(db, archivos):
+    """Procesa varios archivos en paralelo mostrando el progreso de cada uno en una tabla.
+
+    Un lote ya procesado (mismos archivos y modelo) no se vuelve a procesar salvo que se pida
+    explícitamente, para no repetir el costo ni duplicar las lecturas en el historial.
+    """
+    st.subheader(f"📦 Procesamiento por lote ({len(archivos)} archivos)")
+
+    lote = {
+        'modelo': st.session_state['modelo'],
+        'archivos': [(archivo.name, archivo.size) for archivo in archivos]
+    }
+    if (st.session_state.get('resultado_lote') or {}).get('lote') != lote:
+        st.session_state.resultado_lote = None
+
+    if st.session_state.resultado_lote:
+        st.info("Este lote ya fue procesado y sus lecturas están guardadas en el historial.")
+        procesar = st.button(
+            "Reprocesar y guardar de nuevo",
+            key="reprocesar_lote",
+            help="Vuelve a analizar todos los archivos y agrega nuevas lecturas al historial"
+        )
+    else:
+        procesar = st.button(f"Procesar {len(archivos)} archivos", key="procesar_lote")
+
+    if procesar:
+        limite_solicitudes = MAX_CONCURRENCIA if st.session_state['modelo'] == 'GPT-4o (OpenAI)' else MAX_CONCURRENCIA_OLLAMA
+        st.caption(
+            f"Se procesan hasta {MAX_CONCURRENCIA} archivos a la vez ({limite_solicitudes} solicitudes simultáneas al modelo); "
+            f"el resto queda en cola. La tabla se actualiza cada {INTERVALO_REFRESCO} s."
+        )
+        tabla = st.empty()
+        documentos = [(archivo.name, archivo.type, archivo.getvalue()) for archivo in archivos]
+        filas = [
+            {'Archivo': nombre, 'Estado': "⏳ En cola", 'Tiempo (s)': 0.0, 'Costo (USD)': 0.0, 'Detalle': ""}
+            for nombre, _, _ in documentos
+        ]
+
+        def refrescar():
+            tabla.dataframe(filas, use_container_width=True, hide_index=True)
+
+        refrescar()
+        inicio = time.perf_counter()
+        lecturas = asyncio.run(procesar_lote_async(documentos, filas, st.session_state['modelo'], refrescar))
+        duracion = time.perf_counter() - inicio
+
+        # Guardar todas las lecturas exitosas en una sola transacción
+        guardadas = 0
+        if lecturas:
+            try:
+                guardadas = db.guardar_lecturas(lecturas)
+            except Exception as e:
+                st.error(f"❌ Error al guardar las lecturas en la base de datos: {str(e)}")
+                logger.error(f"Error al guardar el lote: {str(e)}")
+
+        st.session_state.resultado_lote = {
+            'lote': lote,
+            'filas': filas,
+            'guardadas': guardadas,
+            'duracion': duracion,
+            'costo': sum(fila['Costo (USD)'] for fila in filas)
+        }
+    elif st.session_state.get('resultado_lote'):
+        st.dataframe(st.session_state.resultado_lote['filas'], use_container_width=True, hide_index=True)
+
+    resultado = st.session_state.get('resultado_lote')
+    if resultado:
+        total = len(resultado['filas'])
+        st.success(
+            f"{resultado['guardadas']} de {total} archivos guardados en el historial | "
+            f"Tiempo total: {resultado['duracion']:.1f} s | Costo total: US${resultado['costo']:.4f}"
+        )
+
 def main():
     try:
         # Configuración de la página
@@ -405,7 +718,7 @@ def main():
         # Página principal - Nueva Lectura
         st.title("📄 Descriptor de Documentos con IA")
         st.markdown("""
-        Sube una imagen del documento para analizarlo automáticamente.
+        Sube una imagen del documento para analizarlo automáticamente, o varios archivos para procesarlos por lote.
         El sistema extraerá toda la información relevante y la analizará con IA.
         Puedes hacer preguntas o solicitar correcciones sobre los datos extraídos.
         """)
@@ -433,7 +746,8 @@ def main():
         col1, col2 = st.columns([3, 2])
 
         with col1:
-            archivo = st.file_uploader("📎 Selecciona un archivo", type=['png', 'jpg', 'jpeg', 'pdf'])
+            archivos = st.file_uploader("📎 Selecciona uno o más archivos", type=['png', 'jpg', 'jpeg', 'pdf'], accept_multiple_files=True)
+            archivo = archivos[0] if len(archivos) == 1 else None
             
             if archivo is not None:
                 st.info(f"📝 Procesando: {archivo.name}")
@@ -547,6 +861,10 @@ def main():
                         st.image(imagen, caption="Documento subido", use_container_width=True)
                 except Exception as e:
                     st.error(f"❌ Error al mostrar la vista previa: {str(e)}")
+
+        # Con varios archivos se usa el procesamiento por lote
+        if len(archivos) > 1:
+            mostrar_procesamiento_lote(db, archivos)
     except Exception as e:
         st.error(f"Error inesperado: {str(e)}")
         logger.error(f"Error inesperado en main: {str(e)}")
@@ -2,6 +2,11 @@ import sqlite3
 from datetime import datetime
 import json
 
+INSERTAR_LECTURA_SQL = '''
+    INSERT INTO lecturas (nombre_archivo, texto_extraido, analisis, modelo, tipo_documento, contenido_archivo)
+    VALUES (?, ?, ?, ?, ?, ?)
+'''
+
 class LecturasDB:
     def __init__(self, db_path="lecturas.db"):
         self.db_path = db_path
@@ -40,15 +45,33 @@ class LecturasDB:
         conn = self.get_connection()
         try:
             cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO lecturas (nombre_archivo, texto_extraido, analisis, modelo, tipo_documento, contenido_archivo)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (nombre_archivo, texto_extraido, analisis, modelo, tipo_documento, contenido_archivo))
+            cursor.execute(INSERTAR_LECTURA_SQL, (nombre_archivo, texto_extraido, analisis, modelo, tipo_documento, contenido_archivo))
             conn.commit()
             return cursor.lastrowid
         finally:
             conn.close()
-    
+
+    def guardar_lecturas(self, lecturas):
+        """Guarda varias lecturas en una sola transacción y retorna cuántas se guardaron.
+
+        Si alguna falla, no se guarda ninguna.
+        """
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.executemany(INSERTAR_LECTURA_SQL, [
+                (lectura['nombre_archivo'], lectura['texto_extraido'], lectura['analisis'], lectura['modelo'],
+                 lectura.get('tipo_documento'), lectura.get('contenido_archivo'))
+                for lectura in lecturas
+            ])
+            conn.commit()
+            return cursor.rowcount
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
     def obtener_lecturas(self, limit=100):
         conn = self.get_connection()
         try: